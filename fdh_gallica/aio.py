@@ -0,0 +1,241 @@
+import asyncio
+import os
+
+import aiohttp
+import xmltodict
+
+from .base import GallicaObject
+from .document import Document, parse_has_alto, parse_page_numbers
+from .parallel_process import gather_results
+from .periodical import Periodical
+from .search import build_query, build_query_urls, parse_total_records, ark_from_record, unwrap_records
+
+
+class AsyncDocument(GallicaObject):
+    """Gallica document object whose network methods are awaitable.
+    All the requests go through the given aiohttp session, whose connector limits how many run concurrently.
+    Urls and parsing are shared with the sync Document it wraps."""
+
+    def __init__(self, ark, session):
+        GallicaObject.__init__(self, ark)
+        self.document = Document(self.ark)
+        self.session = session
+        self.oai_dict = None
+
+    async def oai(self, parse_xml=True):
+        """Retrieve the XML of the OAI information for the document"""
+        content = await get_content(self.session, self.oai_url(), raise_for_status=False)
+        parsed_response = xmltodict.parse(content)
+        self.oai_dict = parsed_response
+        if parse_xml:
+            return parsed_response
+        else:
+            return content
+
+    def oai_url(self):
+        return self.document.oai_url()
+
+    async def iiif_urls(self):
+        """Give all the urls of the IIIF images related to the document"""
+        numbers = await self.page_numbers()
+        return [self.iiif_url_for_page(number) for number in numbers]
+
+    def iiif_url_for_page(self, page):
+        return self.document.iiif_url_for_page(page)
+
+    async def alto_urls(self):
+        """Give the urls of the XML ALTO ocr if it exists"""
+        if not await self.has_alto():
+            raise ValueError("Document does not have OCR")
+        numbers = await self.page_numbers()
+        return [self.document.alto_url(number) for number in numbers]
+
+    async def alto_url_for_page(self, page):
+        if not await self.has_alto():
+            return ""
+        return self.document.alto_url(page)
+
+    async def has_alto(self):
+        """Check if the document has OCR by checking its nqamoyen as explained in the Gallica documentation"""
+        if not self.oai_dict:
+            await self.oai()
+        return parse_has_alto(self.oai_dict)
+
+    async def page_numbers(self):
+        """Give a list of the page numbers"""
+        return parse_page_numbers(await self.pagination())
+
+    async def pagination(self, use_cache=True):
+        """Query the pagination API to get page numbers"""
+        if hasattr(self, "pagination_response"):
+            return self.pagination_response
+        content = await get_content(self.session, self.document.pagination_url(), raise_for_status=False)
+        parsed_response = xmltodict.parse(content)
+        self.pagination_response = parsed_response
+        return parsed_response
+
+    async def generate_download(self, base_path='', export_images=True, export_ocr=True):
+        """Generate a list of urls for the OAI metadata, IIIF urls and ALTO urls of the document"""
+        page_numbers = await self.page_numbers()
+        has_alto = export_ocr and await self.has_alto()
+        return self.document.urls_paths_for_pages(base_path, page_numbers, has_alto, export_images, export_ocr)
+
+
+class AsyncPeriodical(GallicaObject):
+    """Gallica periodical object whose network methods are awaitable.
+    All the requests go through the given aiohttp session, whose connector limits how many run concurrently.
+    Urls and parsing are shared with the sync Periodical it wraps."""
+
+    def __init__(self, ark, session):
+        GallicaObject.__init__(self, ark)
+        self.periodical = Periodical(self.ark)
+        self.session = session
+
+    async def issues(self, use_cache=True):
+        """Find all issues of a periodical, store them in documents"""
+        years = await self.years_of_issues()
+        urls = [self.periodical.issues_url(year) for year in years]
+
+        if use_cache and hasattr(self, 'documents') and hasattr(self, 'failures'):
+            if len(self.failures) == 0:
+                return self.documents
+            else:
+                urls = self.failures
+
+        results, failures = await request_and_parse_urls(self.session, urls)
+        issues = []
+        for parsed_result in results:
+            issues += self.parse_issues(parsed_result)
+        self.documents = issues
+        self.failures = failures
+        return issues
+
+    async def years_of_issues(self):
+        """Find the different year of the issues"""
+        content = await get_content(self.session, self.periodical.years_url(), raise_for_status=False)
+        return self.periodical.parse_years(xmltodict.parse(content))
+
+    async def issues_per_year(self, year):
+        parsed_response = await request_and_parse(self.session, self.periodical.issues_url(year))
+        return self.parse_issues(parsed_response)
+
+    def parse_issues(self, parsed_response):
+        """Given an issue creates an async document object"""
+        return [AsyncDocument(document.ark, self.session)
+                for document in self.periodical.parse_issues(parsed_response)]
+
+    async def generate_download(self, base_path='', export_images=True, export_ocr=True, verbose=True):
+        """Generate the download urls and paths of all the documents of the periodical.
+        All the issues are requested at once, the connector of the session limits how many run concurrently."""
+        years = await self.years_of_issues()
+        issues_per_year = await asyncio.gather(*[self.issues_per_year(year) for year in years])
+        urls_paths_per_issue = await asyncio.gather(*[
+            issue.generate_download(os.path.join(base_path, year), export_images, export_ocr)
+            for year, issues in zip(years, issues_per_year)
+            for issue in issues
+        ])
+        return [url_path for urls_paths in urls_paths_per_issue for url_path in urls_paths]
+
+
+class AsyncSearch(object):
+    """Gallica search object whose network methods are awaitable.
+    Use AsyncSearch.create to build it, as the total number of records has to be fetched."""
+
+    def __init__(self, session, all_fields=None, dc_type=None, dc_creator=None, dc_title=None, and_query=True,
+                 **kwargs):
+        """Accepts all the elements of a search query as arguments, without querying Gallica.
+        The kwargs is an optional additional parameter that can be specified"""
+        self.session = session
+        self.base_query = build_query(all_fields, dc_type, dc_creator, dc_title, and_query, **kwargs)
+        self.total_records = None
+
+    @classmethod
+    async def create(cls, session, all_fields=None, dc_type=None, dc_creator=None, dc_title=None, and_query=True,
+                     **kwargs):
+        """Build the search and fetch its total number of records"""
+        search = cls(session, all_fields, dc_type, dc_creator, dc_title, and_query, **kwargs)
+        search.total_records = await search.get_total_records()
+        if search.total_records <= 0:
+            raise ValueError("Query did not yield any record")
+        return search
+
+    async def execute(self, max_records=-1):
+        """Execute the query of the search, behaves like Search.execute"""
+        if self.total_records is None:
+            self.total_records = await self.get_total_records()
+        urls = build_query_urls(self.base_query, self.total_records, max_records)
+        records, failures = await request_and_parse_search_queries(self.session, urls)
+        self.documents = [AsyncDocument(ark_from_record(record), self.session) for record in records]
+        self.records = records
+        self.failures = failures
+        return len(self.failures) == 0
+
+    async def retry(self):
+        """Retry to execute the query only on the failed urls.
+        Otherwise behaves like self.execute.
+        """
+        if len(self.failures) <= 0:
+            return True
+        records, failures = await request_and_parse_search_queries(self.session, self.failures)
+        self.records += records
+        self.documents += [AsyncDocument(ark_from_record(record), self.session) for record in records]
+        self.failures = failures
+        return len(self.failures) == 0
+
+    async def get_total_records(self):
+        """Fetch in the search result the total number of records"""
+        result_parsed = await request_and_parse(self.session, self.base_query + "&maximumRecords=0")
+        return parse_total_records(result_parsed)
+
+
+async def get_content(session, url, raise_for_status=True):
+    """Get the content of an url"""
+    async with session.get(url) as response:
+        if raise_for_status:
+            response.raise_for_status()
+        return await response.read()
+
+
+async def request_and_parse(session, xml_url):
+    """Get an xml url and parse it into a python dict"""
+    content = await get_content(session, xml_url)
+    return xmltodict.parse(content)
+
+
+async def request_and_parse_urls(session, xml_urls):
+    """Get and parse concurrently using xmltodict the urls of XMLs, returns the results and the failed urls.
+    All the urls are requested at once, the connector of the session limits how many run concurrently."""
+    return gather_results(await asyncio.gather(*[_request_and_parse(session, url) for url in xml_urls]))
+
+
+async def _request_and_parse(session, url):
+    """Wrapper of request_and_parse returning a tuple of (success, failure)"""
+    try:
+        return await request_and_parse(session, url), None
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None, url
+
+
+async def request_and_parse_search_queries(session, urls):
+    """Given the url of the search query, get it and unwrap the records to get their dublin core."""
+    records = []
+    results, failures = await request_and_parse_urls(session, urls)
+    for result_parsed in results:
+        records += unwrap_records(result_parsed)
+    return records, failures
+
+
+async def generate_download_for_documents(documents, base_dir, export_images=True, export_ocr=True):
+    """Generate concurrently the download list of urls and paths for a list of async Gallica document objects"""
+    return gather_results(await asyncio.gather(*[
+        _urls_paths(document, base_dir, export_images, export_ocr) for document in documents
+    ]))
+
+
+async def _urls_paths(document, base_dir, export_images, export_ocr):
+    """Wrapper for AsyncDocument.generate_download returning a tuple of (success, failure)"""
+    try:
+        return await document.generate_download(base_dir, export_images, export_ocr), None
+    except Exception:
+        return None, document
+
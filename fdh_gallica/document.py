@@ -33,6 +33,9 @@ class Document(GallicaObject):
     def oai_url(self):
         return "/".join([OAI_BASEURL, self.ark])
 
+    def pagination_url(self):
+        return "".join([PAGINATION_BASEURL, self.ark_name])
+
     def iiif_urls(self):
         """Give all the urls of the IIIF images related to the document"""
         numbers = self.page_numbers()
@@ -54,34 +57,27 @@ class Document(GallicaObject):
     def alto_url_for_page(self, page):
         if not self.has_alto():
             return ""
-        url = ALTO_BASEURL % (self.ark_name, page)
-        return url
+        return self.alto_url(page)
+
+    def alto_url(self, page):
+        """Give the url of the XML ALTO ocr of a page, without checking that the document has OCR"""
+        return ALTO_BASEURL % (self.ark_name, page)
 
     def has_alto(self):
         """Check if the document has OCR by checking its nqamoyen as explained in the Gallica documentation"""
         if not self.oai_dict:
             self.oai()
-        try:
-            return float(self.oai_dict['results']['nqamoyen']) >= 50.0
-        except KeyError:
-            return False
-        except ValueError:
-            return False
+        return parse_has_alto(self.oai_dict)
 
     def page_numbers(self):
         """Give a list of the page numbers"""
-        pagination_info = self.pagination()
-        try:
-            pages = makelist(pagination_info['livre']['pages']['page'])
-            return [page['ordre'] for page in pages]
-        except KeyError:
-            return []
+        return parse_page_numbers(self.pagination())
 
     def pagination(self, use_cache=True):
         """Query the pagination API to get page numbers"""
         if hasattr(self, "pagination_response"):
             return self.pagination_response
-        url = "".join([PAGINATION_BASEURL, self.ark_name])
+        url = self.pagination_url()
         response = requests.get(url)
         parsed_response = xmltodict.parse(response.content)
         self.pagination_response = parsed_response
@@ -89,23 +85,46 @@ class Document(GallicaObject):
 
     def generate_download(self, base_path='', export_images=True, export_ocr=True):
         """Generate a list of urls for the OAI metadata, IIIF urls and ALTO urls of the document"""
+        page_numbers = self.page_numbers()
+        has_alto = export_ocr and self.has_alto()
+        return self.urls_paths_for_pages(base_path, page_numbers, has_alto, export_images, export_ocr)
+
+    def urls_paths_for_pages(self, base_path, page_numbers, has_alto, export_images=True, export_ocr=True):
+        """Given the page numbers and OCR availability of the document, build its list of urls and paths"""
         urls_paths = []
         base_path = os.path.join(base_path, self.ark_name)
         urls_paths.append((self.oai_url(), os.path.join(base_path, self.ark_name + '_oai.xml')))
-        iiif_urls = self.iiif_urls()
-        page_numbers = self.page_numbers()
-        if export_images and len(iiif_urls) > 0:
+        if export_images and len(page_numbers) > 0:
             images_dir = os.path.join(base_path, 'images')
-            for page_num, image_url in zip(page_numbers, iiif_urls):
-                urls_paths.append((image_url, os.path.join(
+            for page_num in page_numbers:
+                urls_paths.append((self.iiif_url_for_page(page_num), os.path.join(
                     images_dir,
                     "%s_%03d.jpg" % (self.ark_name, int(page_num))
                 )))
-        if export_ocr and self.has_alto():
+        if export_ocr and has_alto:
             alto_dir = os.path.join(base_path, 'alto')
-            for page_num, alto_url in zip(page_numbers, self.alto_urls()):
-                urls_paths.append((alto_url, os.path.join(
+            for page_num in page_numbers:
+                urls_paths.append((self.alto_url(page_num), os.path.join(
                     alto_dir,
                     "%s_%03d.xml" % (self.ark_name, int(page_num))
                 )))
         return urls_paths
+
+
+def parse_has_alto(oai_dict):
+    """Given the parsed OAI of a document, check its nqamoyen as explained in the Gallica documentation"""
+    try:
+        return float(oai_dict['results']['nqamoyen']) >= 50.0
+    except KeyError:
+        return False
+    except ValueError:
+        return False
+
+
+def parse_page_numbers(pagination_info):
+    """Given the parsed pagination of a document, give the list of its page numbers"""
+    try:
+        pages = makelist(pagination_info['livre']['pages']['page'])
+        return [page['ordre'] for page in pages]
+    except KeyError:
+        return []
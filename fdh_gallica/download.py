@@ -1,5 +1,6 @@
 import os
 import shutil
+from functools import partial
 from multiprocessing import Pool
 
 import requests
@@ -9,73 +10,194 @@ from tqdm.autonotebook import tqdm
 
 from .utils import print_if_verbose
 from .parallel_process import parallel_process
+from .store import add_to_store, fetch_from_store, remove_from_store
+from .verification import (INVALID, append_entry, is_verified, load_index, make_entry, open_journal,
+                           save_index)
 
 
 def download_with_retry(urls_path, num_retry=5,
                         processes=4,
-                        verbose=False):
-    """Given a list of urls and paths, download each url to its given path. Retry for each url up to num_retry."""
-    num_retry_per_path = {path: 1 for _, path in urls_path}
+                        verbose=False,
+                        index_path=None,
+                        reverify=False,
+                        store_dir=None):
+    """Given a list of urls and paths, download each url to its given path. Retry for each url up to num_retry.
+    If index_path is given, files already verified and unchanged since are neither downloaded nor checked again,
+    unless reverify is True in which case they are all checked again and their checksum compared to the index.
+    Entries are appended to the index as soon as they are verified, so interrupted runs keep their work.
+    If store_dir is given, urls already in this content store are linked instead of downloaded,
+    and the verified files are added to it."""
+    index = load_index(index_path) if index_path else {}
+    journal = open_journal(index_path) if index_path else None
+    journal_start = journal.tell() if journal else 0
+
+    def record(entry, failure):
+        """Store an entry in the index as soon as it is verified"""
+        if entry:
+            index[entry['path']] = entry
+            if journal:
+                append_entry(journal, entry)
+
+    with_entries = journal is not None
+    verified = [(url, path) for url, path in urls_path if is_verified(index.get(path))]
+    verified_paths = set(path for _, path in verified)
+    urls_path = [(url, path) for url, path in urls_path if path not in verified_paths]
+    num_retry_per_path = {path: 1 for _, path in urls_path + verified}
     definitive_failures = []
-    print_if_verbose("Downloading files", verbose)
-    failures = set(download(urls_path, processes, verbose))
-    print_if_verbose("Verifying files", verbose)
-    failures = failures.union(set(check_downloads(urls_path, processes, verbose)))
-    while len(failures) > 0:
-        print("Retry failures")
-        retry_list = []
-        for url, path in failures:
-            num_retry_per_path[path] += 1
-            if num_retry_per_path[path] <= num_retry:
-                retry_list.append((url, path))
-            else:
-                definitive_failures.append((url, path))
+    try:
+        if reverify and len(verified) > 0:
+            print_if_verbose("Reverifying files", verbose)
+            urls_paths_checksums = [(url, path, index[path]['checksum']) for url, path in verified]
+            urls_path.extend(reverify_downloads(urls_paths_checksums, processes, verbose, store_dir, record))
+        elif len(verified) > 0:
+            print_if_verbose("Skipping %d verified files" % len(verified), verbose)
+            if store_dir:
+                for entry in store_verified(verified, index, store_dir):
+                    record(entry, None)
+
         print_if_verbose("Downloading files", verbose)
-        failures = set(download(retry_list, processes=2, progress=verbose))
+        failures = set(download(urls_path, processes, verbose, store_dir=store_dir))
         print_if_verbose("Verifying files", verbose)
-        failures = failures.union(set(check_downloads(retry_list, processes, verbose)))
+        failures = failures.union(set(verify_downloads(urls_path, processes, verbose, store_dir,
+                                                       with_entries=with_entries, on_result=record)[1]))
+        while len(failures) > 0:
+            print("Retry failures")
+            retry_list = []
+            for url, path in failures:
+                num_retry_per_path[path] += 1
+                if num_retry_per_path[path] <= num_retry:
+                    retry_list.append((url, path))
+                else:
+                    definitive_failures.append((url, path))
+            print_if_verbose("Downloading files", verbose)
+            failures = set(download(retry_list, processes=2, progress=verbose, store_dir=store_dir))
+            print_if_verbose("Verifying files", verbose)
+            failures = failures.union(set(verify_downloads(retry_list, processes, verbose, store_dir,
+                                                           with_entries=with_entries, on_result=record)[1]))
+    finally:
+        if journal:
+            journal_end = journal.tell()
+            journal.close()
+    # Compact the entries appended during the run
+    if journal and journal_end > journal_start:
+        save_index(index, index_path)
     return definitive_failures
 
 
-def download(urls_path, processes=4, progress=True, leave_progress=True):
+def store_verified(urls_path, index, store_dir):
+    """Add files already verified in the index to the content store.
+    Returns the updated index entries of the files that were replaced by a link to the store."""
+    entries = []
+    for url, path in urls_path:
+        checksum = index[path]['checksum']
+        try:
+            if add_to_store(store_dir, url, path, checksum):
+                entries.append(make_entry(path, True, checksum))
+        except OSError:
+            continue
+    return entries
+
+
+def download(urls_path, processes=4, progress=True, leave_progress=True, store_dir=None):
     """Given a list of urls and paths, download each url to its given path."""
-    return parallel_process(download_item, urls_path, processes, progress)[1]
+    return parallel_process(partial(download_item, store_dir=store_dir), urls_path, processes, progress)[1]
 
 
-def download_item(url_path):
-    """Download an url to a given path"""
+def download_item(url_path, store_dir=None):
+    """Download an url to a given path, link it from the content store if it is already there"""
     url, path = url_path
+    # Never write through path, it may be a hardlink to a file of the content store
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
     try:
         dirname = os.path.dirname(path)
         os.makedirs(dirname, exist_ok=True)
+        if store_dir and fetch_from_store(store_dir, url, path):
+            return None, None
         r = requests.get(url, stream=True)
         r.raise_for_status()
-        with open(path, 'wb') as f:
+        with open(tmp_path, 'wb') as f:
             r.raw.decode_content = True
             shutil.copyfileobj(r.raw, f)
+        os.replace(tmp_path, path)
     except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return None, (url, path)
     else:
         return None, None
 
 
-def check_downloads(urls_path, processes=4, progress=True, leave_progress=True):
-    """Check that all the paths are valid files"""
-    return parallel_process(check_item, urls_path, processes, progress)[1]
+def check_downloads(urls_path, processes=4, progress=True, leave_progress=True, index=None):
+    """Check that all the paths are valid files.
+    If a verification index (c.f. verification.load_index) is given, files verified and unchanged since are trusted."""
+    return verify_downloads(urls_path, processes, progress, index=index)[1]
+
+
+def verify_downloads(urls_path, processes=4, progress=True, store_dir=None, index=None,
+                     with_entries=False, on_result=None):
+    """Check that all the paths are valid files, returns the verification index entries and the failures.
+    The entries, which need the checksum of each file, are only computed if with_entries is True or with a store.
+    If store_dir is given, the valid files are added to the content store.
+    If a verification index is given, files verified and unchanged since are trusted with a single stat
+    and no new entry is returned for them.
+    on_result is called with each entry and failure as soon as they are available."""
+    if index:
+        urls_path = [(url, path) for url, path in urls_path if not is_verified(index.get(path))]
+    return parallel_process(partial(check_item, store_dir=store_dir, with_entry=with_entries),
+                            urls_path, processes, progress, on_result)
 
 
-def check_item(url_path):
-    """Check that a path is a valid file"""
+def reverify_downloads(urls_paths_checksums, processes=4, progress=True, store_dir=None, on_result=None):
+    """Check again files given with the checksum they were verified with, returns the failures.
+    on_result is called with each new entry and failure as soon as they are available."""
+    return parallel_process(partial(reverify_item, store_dir=store_dir),
+                            urls_paths_checksums, processes, progress, on_result)[1]
+
+
+def check_item(url_path, store_dir=None, with_entry=False):
+    """Check that a path is a valid file, returns its verification index entry and the failure if any.
+    The entry is None unless with_entry is True or a store is given."""
     url, path = url_path
     checker = lambda x: False
     if path.endswith('.jpg'):
         checker = check_jpg
     elif path.endswith('.xml'):
         checker = check_xml
-    if checker(path):
-        return None, None
+    valid = checker(path)
+    entry = make_entry(path, valid) if with_entry or store_dir else None
+    if valid:
+        if store_dir:
+            entry = store_checked(store_dir, url, path, entry)
+        return entry, None
     else:
-        return None, (url, path)
+        if store_dir:
+            remove_from_store(store_dir, url)
+        return entry, (url, path)
+
+
+def reverify_item(url_path_checksum, store_dir=None):
+    """Check again a verified file, it is a failure if it is no longer valid or if its checksum changed"""
+    url, path, checksum = url_path_checksum
+    entry, failure = check_item((url, path), with_entry=True)
+    if entry and not failure and entry['checksum'] != checksum:
+        entry['verdict'] = INVALID
+        failure = (url, path)
+    if store_dir:
+        if failure:
+            remove_from_store(store_dir, url)
+        else:
+            entry = store_checked(store_dir, url, path, entry)
+    return entry, failure
+
+
+def store_checked(store_dir, url, path, entry):
+    """Add a valid file to the content store, returns its index entry updated in case path is now a link"""
+    try:
+        if add_to_store(store_dir, url, path, entry['checksum']):
+            return make_entry(path, True, entry['checksum'])
+    except OSError:
+        pass
+    return entry
 
 
 def check_jpg(jpg_path):
@@ -6,19 +6,25 @@ from tqdm.autonotebook import tqdm
 from .utils import request_and_parse
 
 
-def parallel_process(func, items, processes=4, progress=True):
+def parallel_process(func, items, processes=4, progress=True, on_result=None):
     """Process in parallel a list of item with a given function
     The function should return tuple of (success, failure).
-    Each of them will be stored in a list of results and failures if not None"""
+    Each of them will be stored in a list of results and failures if not None
+    If on_result is given, it is called with each (success, failure) as soon as it is available"""
+    map_result = []
+    with Pool(processes) as p:
+        for result_failure in tqdm(p.imap(func, items), total=len(items), disable=(not progress)):
+            if on_result:
+                on_result(*result_failure)
+            map_result.append(result_failure)
+    return gather_results(map_result)
+
+
+def gather_results(results_failures):
+    """Split a list of (success, failure) tuples into a list of results and a list of failures"""
     results = []
     failures = []
-
-    with Pool(processes) as p:
-        map_result = list(tqdm(
-            p.imap(func, items),
-            total=len(items),
-            disable=(not progress)))
-    for result, failure in map_result:
+    for result, failure in results_failures:
         if result:
             if isinstance(result, list):
                 results.extend(result)
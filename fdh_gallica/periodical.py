@@ -17,8 +17,7 @@ class Periodical(GallicaObject):
     def issues(self, use_cache=True, processes=4, progress=False):
         """Find all issues of a periodical, store them in documents"""
         years = self.years_of_issues()
-        urls = ["/".join([ISSUES_BASEURL, self.ark, 'date&date=%s' % year])
-                for year in years]
+        urls = [self.issues_url(year) for year in years]
 
         if use_cache and hasattr(self, 'documents') and hasattr(self, 'failures'):
             if len(self.failures) == 0:
@@ -36,9 +35,19 @@ class Periodical(GallicaObject):
 
     def years_of_issues(self):
         """Find the different year of the issues"""
-        url = "/".join([ISSUES_BASEURL, self.ark, 'date'])
+        url = self.years_url()
         response = requests.get(url)
         parsed_response = xmltodict.parse(response.content)
+        return self.parse_years(parsed_response)
+
+    def years_url(self):
+        return "/".join([ISSUES_BASEURL, self.ark, 'date'])
+
+    def issues_url(self, year):
+        return "/".join([ISSUES_BASEURL, self.ark, 'date&date=%s' % year])
+
+    def parse_years(self, parsed_response):
+        """Given the parsed dates of the periodical, give the years of its issues"""
         try:
             years = makelist(parsed_response['issues']['year'])
             return years
@@ -47,7 +56,7 @@ class Periodical(GallicaObject):
             return []
 
     def issues_per_year(self, year):
-        url = "/".join([ISSUES_BASEURL, self.ark, 'date&date=%s' % year])
+        url = self.issues_url(year)
         parsed_response = request_and_parse(url)
         return self.parse_issues(parsed_response)
 
@@ -29,15 +29,7 @@ class Search(object):
         Store the urls of failures in self.failures
         Returns True if all the records were retrieved, False if there is some failures"""
 
-        total_records = self.total_records
-        if max_records != -1 and max_records < self.total_records:
-            total_records = max_records
-
-        # Generate the list of all urls for all records up to total_records
-        urls = [self.base_query +
-                "&maximumRecords=%d" % NUM_RESULTS_PER_QUERY +
-                "&startRecord=%d" % offset
-                for offset in range(1, total_records, NUM_RESULTS_PER_QUERY)]
+        urls = self.query_urls(max_records)
         records, failures = request_and_parse_search_queries(urls,
                                                              processes,
                                                              progress)
@@ -46,6 +38,10 @@ class Search(object):
         self.failures = failures
         return len(self.failures) == 0
 
+    def query_urls(self, max_records=-1):
+        """Generate the list of all urls for all records up to max_records"""
+        return build_query_urls(self.base_query, self.total_records, max_records)
+
     def retry(self, processes=1, progress=True):
         """Retry to execute the query only on the failed urls.
         Otherwise behaves like self.execute.
@@ -62,20 +58,33 @@ class Search(object):
 
     def get_total_records(self):
         """Fetch in the search result the total number of records"""
-        result_parsed = request_and_parse(self.base_query + "&maximumRecords=0")
-        try:
-            return int(result_parsed['srw:searchRetrieveResponse']['srw:numberOfRecords'])
-        except KeyError:
-            return 0
+        result_parsed = request_and_parse(self.total_records_url())
+        return parse_total_records(result_parsed)
+
+    def total_records_url(self):
+        return self.base_query + "&maximumRecords=0"
+
+
+def parse_total_records(result_parsed):
+    """Given a parsed search result, give the total number of records"""
+    try:
+        return int(result_parsed['srw:searchRetrieveResponse']['srw:numberOfRecords'])
+    except KeyError:
+        return 0
 
 
 def generate_document_from_record(record):
     """Given the xml of a record create a gallica document object"""
+    return Document(ark_from_record(record))
+
+
+def ark_from_record(record):
+    """Given the xml of a record find the ark of its document"""
     try:
-        ark = list(filter(lambda x: 'ark' in x, makelist(record['dc:identifier'])))[0].replace('https://gallica.bnf.fr/ark:/', '')
+        return list(filter(lambda x: 'ark' in x, makelist(record['dc:identifier'])))[0].replace('https://gallica.bnf.fr/ark:/', '')
     except IndexError:
         raise ValueError("Record did not contain a valid ark")
-    return Document(ark)
+
 
 def build_query(all_fields=None, dc_type=None, dc_creator=None, dc_title=None, and_query=True, **kwargs):
     """Given different search arguments build the url of the search query."""
@@ -102,6 +111,17 @@ def build_query(all_fields=None, dc_type=None, dc_creator=None, dc_title=None, a
     return query
 
 
+def build_query_urls(base_query, total_records, max_records=-1):
+    """Given the url of a search query, generate the urls of all its records up to max_records"""
+    if max_records != -1 and max_records < total_records:
+        total_records = max_records
+
+    return [base_query +
+            "&maximumRecords=%d" % NUM_RESULTS_PER_QUERY +
+            "&startRecord=%d" % offset
+            for offset in range(1, total_records, NUM_RESULTS_PER_QUERY)]
+
+
 def request_and_parse_search_queries(urls, processes, progress):
     """Given the url of the search query, get it and unwrap the records to get their dublin core."""
     records = []
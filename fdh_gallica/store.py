@@ -0,0 +1,88 @@
+import hashlib
+import os
+import shutil
+
+from .verification import file_checksum
+
+
+def url_key_path(store_dir, url):
+    """Path of the entry of an url in the content store, it contains the checksum of its file"""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(store_dir, 'urls', key[:2], key)
+
+
+def object_path(store_dir, checksum):
+    """Path of the file with a given md5 checksum in the content store"""
+    return os.path.join(store_dir, 'objects', checksum[:2], checksum)
+
+
+def fetch_from_store(store_dir, url, path):
+    """Link the stored file of an url to the given path.
+    Returns False if the url is not in the store or if its stored file is corrupted, the entry is then removed."""
+    key_path = url_key_path(store_dir, url)
+    try:
+        with open(key_path, 'r') as infile:
+            checksum = infile.read().strip()
+    except OSError:
+        return False
+    stored_path = object_path(store_dir, checksum)
+    if not os.path.exists(stored_path) or file_checksum(stored_path) != checksum:
+        remove_from_store(store_dir, url)
+        return False
+    link_or_copy(stored_path, path)
+    return True
+
+
+def add_to_store(store_dir, url, path, checksum):
+    """Add a verified file to the store, both under its url and its checksum.
+    If the same content is already stored and intact, the file at path is replaced by a link to it,
+    otherwise the stored file is replaced by the one at path.
+    Returns True if the file at path was replaced."""
+    key_path = url_key_path(store_dir, url)
+    if os.path.exists(key_path):
+        return False
+    stored_path = object_path(store_dir, checksum)
+    replaced = os.path.exists(stored_path) and file_checksum(stored_path) == checksum
+    if replaced:
+        link_or_copy(stored_path, path)
+    else:
+        link_or_copy(path, stored_path)
+    write_atomically(key_path, checksum)
+    return replaced
+
+
+def remove_from_store(store_dir, url):
+    """Remove the entry of an url from the store, along with its file if it no longer matches its checksum"""
+    key_path = url_key_path(store_dir, url)
+    try:
+        with open(key_path, 'r') as infile:
+            checksum = infile.read().strip()
+        os.remove(key_path)
+    except OSError:
+        return
+    stored_path = object_path(store_dir, checksum)
+    try:
+        if file_checksum(stored_path) != checksum:
+            os.remove(stored_path)
+    except OSError:
+        pass
+
+
+def link_or_copy(src, dst):
+    """Hardlink src to dst, copy it if they are not on the same filesystem. dst is replaced atomically."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_path = '%s.%d.tmp' % (dst, os.getpid())
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def write_atomically(path, content):
+    """Write a text file, replacing the previous one atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as outfile:
+        outfile.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,91 @@
+import csv
+import hashlib
+import os
+
+INDEX_FIELDS = ['path', 'size', 'mtime', 'checksum', 'verdict']
+VALID = 'valid'
+INVALID = 'invalid'
+
+
+def load_index(index_path):
+    """Read a verification index CSV into a dict mapping each path to its entry.
+    Entries appended later override the previous ones of the same path."""
+    index = {}
+    if not os.path.exists(index_path):
+        return index
+    with open(index_path, 'r', newline='') as infile:
+        for row in csv.DictReader(infile):
+            try:
+                row['size'] = int(row['size'])
+                row['mtime'] = int(row['mtime'])
+            except (TypeError, ValueError):
+                # Last row of an interrupted run
+                continue
+            index[row['path']] = row
+    return index
+
+
+def open_journal(index_path):
+    """Open a verification index to append entries to it as soon as they are verified"""
+    dirname = os.path.dirname(index_path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    is_new = not os.path.exists(index_path) or os.path.getsize(index_path) == 0
+    # Line buffered so that each entry is written at once
+    journal = open(index_path, 'a', newline='', buffering=1)
+    if is_new:
+        csv.DictWriter(journal, fieldnames=INDEX_FIELDS).writeheader()
+    return journal
+
+
+def append_entry(journal, entry):
+    """Append an entry to a verification index opened with open_journal"""
+    csv.DictWriter(journal, fieldnames=INDEX_FIELDS).writerow(entry)
+
+
+def save_index(index, index_path):
+    """Write a verification index to a CSV, replacing the previous file atomically"""
+    dirname = os.path.dirname(index_path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=INDEX_FIELDS)
+        writer.writeheader()
+        for path in sorted(index):
+            writer.writerow(index[path])
+    os.replace(tmp_path, index_path)
+
+
+def make_entry(path, valid, checksum=None):
+    """Create the index entry of a file that was just checked, None if the file does not exist.
+    The checksum is computed unless it is given"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {'path': path,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'checksum': checksum or file_checksum(path),
+            'verdict': VALID if valid else INVALID}
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """Compute the md5 hex digest of a file"""
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def is_verified(entry):
+    """Check with a single stat that a file was verified as valid and has not changed since"""
+    if not entry or entry['verdict'] != VALID:
+        return False
+    try:
+        stat = os.stat(entry['path'])
+    except OSError:
+        return False
+    return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime']
@@ -29,19 +29,40 @@ if __name__ == '__main__':
                              type=str,
                              default=None,
                              help='optionally store failures')
+    args_parser.add_argument('-i',
+                             '--index',
+                             metavar='index_path',
+                             type=str,
+                             default=None,
+                             help='optionally store verified files to skip them on later runs')
+    args_parser.add_argument('--reverify',
+                             action='store_true',
+                             help="check again the files already verified in the index")
+    args_parser.add_argument('-s',
+                             '--store',
+                             metavar='store_dir',
+                             type=str,
+                             default=None,
+                             help='optionally share downloaded files between exports through a content store')
     args_parser.add_argument('-q',
                              '--quiet',
                              action='store_false',
                              help="disable console output")
 
     args = args_parser.parse_args()
+    if args.reverify and not args.index:
+        args_parser.error("--reverify requires --index")
     urls_paths_path = args.urls_paths
     processes = args.processes
     num_retry = args.retry
     failures_path = args.failures
+    index_path = args.index
+    reverify = args.reverify
+    store_dir = args.store
     quiet = args.quiet
 
     urls_paths = read_tuple_list(urls_paths_path)
-    failures = download_with_retry(urls_paths, num_retry, processes, quiet)
+    failures = download_with_retry(urls_paths, num_retry, processes, quiet,
+                                   index_path, reverify, store_dir)
     if failures_path:
         write_tuple_list(failures, failures_path)
@@ -14,4 +14,7 @@ setup(name='fdh_gallica',
           'requests',
           'tqdm',
           'xmltodict'
-      ])
+      ],
+      extras_require={
+          'async': ['aiohttp']
+      })